@@ -5,19 +5,328 @@ Requires the paramiko library: pip install paramiko
 """
 
 import paramiko
+import atexit
 import getpass
+import shlex
+import socket
 import sys
-import time
-from typing import List, Tuple
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# Maximum number of hosts updated at once. paramiko runs a thread per open
+# connection, so this also bounds thread count and memory on large server lists.
+MAX_WORKERS = 32
+
+# Seconds to wait for the TCP connection to a server
+CONNECT_TIMEOUT = 10
+
+# Skip slow legacy key exchange so negotiation settles on a modern algorithm
+DISABLED_ALGORITHMS = {"kex": ["diffie-hellman-group14-sha1"]}
+
+# Number of resolved hostnames kept, so the cache stays bounded on large server lists
+DNS_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=DNS_CACHE_SIZE)
+def resolve_host(hostname: str, port: int) -> Tuple[Tuple[int, tuple], ...]:
+    """
+    Resolve a hostname once and cache its addresses for later connections.
+    
+    Args:
+        hostname: The server hostname or IP address
+        port: SSH port
+        
+    Returns:
+        Tuple of (address_family, socket_address) pairs, in getaddrinfo order
+    """
+    addresses = socket.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+    return tuple((family, sockaddr) for family, _, _, _, sockaddr in addresses)
+
+
+def open_socket(hostname: str, port: int) -> socket.socket:
+    """
+    Open a TCP connection to the host, trying each resolved address in turn.
+    
+    This matches paramiko's own fallback, so e.g. a dual-stack host whose first
+    address is an unreachable IPv6 one is still reached over IPv4.
+    
+    Args:
+        hostname: The server hostname or IP address
+        port: SSH port
+        
+    Returns:
+        Connected socket
+    """
+    last_error: Optional[OSError] = None
+    for family, sockaddr in resolve_host(hostname, port):
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            sock.close()
+            last_error = e
+    
+    raise last_error or OSError(f"No addresses found for {hostname}")
+
+
+class SSHConnectionPool:
+    """
+    Keep SSH connections open so repeated operations on a host skip the handshake.
+    Connections are keyed by (hostname, port, username). Callers borrow a connection
+    with get() and hand it back with release(); once more than max_idle connections
+    are open, the least recently used idle ones are closed.
+    """
+    
+    def __init__(self, keepalive: int = 30, max_idle: int = MAX_WORKERS):
+        """
+        Args:
+            keepalive: Seconds between keepalive packets, so idle connections survive NAT timeouts
+            max_idle: Number of open connections kept before idle ones are closed
+        """
+        self.keepalive = keepalive
+        self.max_idle = max_idle
+        self._clients: "OrderedDict[Tuple[str, int, str], paramiko.SSHClient]" = OrderedDict()
+        # Borrow counts are kept per client, so a connection that has been replaced
+        # or dropped from the pool is still closed only once nobody is using it
+        self._in_use: Dict[paramiko.SSHClient, int] = {}
+        self._closing: Set[paramiko.SSHClient] = set()
+        self._connecting: Dict[Tuple[str, int, str], Future] = {}
+        self._lock = threading.Lock()
+    
+    def get(
+        self,
+        hostname: str,
+        port: int,
+        username: str,
+        password: Optional[str],
+        key_filename: Optional[str] = None,
+    ) -> paramiko.SSHClient:
+        """
+        Borrow a connected client for the host, opening a new connection only if needed.
+        
+        Args:
+            hostname: The server hostname or IP address
+            port: SSH port
+            username: Username for SSH login
+            password: Password for SSH login (or key passphrase), None to use keys only
+            key_filename: Private key file to authenticate with, tried before ssh-agent keys
+            
+        Returns:
+            Connected paramiko.SSHClient, to be handed back with release()
+        """
+        key = (hostname, port, username)
+        while True:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is not None:
+                    transport = client.get_transport()
+                    if transport is not None and transport.is_active():
+                        self._clients.move_to_end(key)
+                        self._in_use[client] = self._in_use.get(client, 0) + 1
+                        return client
+                
+                # Only one handshake per host at a time - later callers wait for it
+                # instead of each doing their own key exchange and authentication
+                pending = self._connecting.get(key)
+                if pending is None:
+                    pending = Future()
+                    self._connecting[key] = pending
+                    break
+            
+            # Another thread is connecting to this host - wait for it, then borrow
+            # its connection. Its connection error is raised here too.
+            pending.result()
+        
+        if client is not None:
+            # The pooled connection has dropped - nobody can use it any more
+            with self._lock:
+                self._forget(client)
+            client.close()
+        
+        try:
+            client = self._connect(hostname, port, username, password, key_filename)
+        except Exception as e:
+            with self._lock:
+                del self._connecting[key]
+            pending.set_exception(e)
+            raise
+        
+        with self._lock:
+            del self._connecting[key]
+            self._clients[key] = client
+            self._in_use[client] = 1
+            evicted = self._evict_idle()
+        pending.set_result(client)
+        for idle_client in evicted:
+            idle_client.close()
+        return client
+    
+    def _connect(
+        self,
+        hostname: str,
+        port: int,
+        username: str,
+        password: Optional[str],
+        key_filename: Optional[str],
+    ) -> paramiko.SSHClient:
+        """Open a new connection to the host. Arguments are as for get()."""
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        
+        print(f"Connecting to {hostname}:{port}...")
+        # Connect to the cached addresses - paramiko still uses the original hostname
+        # for host key checks
+        sock = open_socket(hostname, port)
+        # Key and agent auth are tried before the password, which avoids the extra
+        # keyboard-interactive round trips password auth often takes. On password-only
+        # runs they are skipped: every agent and ~/.ssh key counts against the server's
+        # MaxAuthTries, so with several keys the password would never get a turn.
+        use_keys = key_filename is not None or password is None
+        try:
+            client.connect(
+                hostname,
+                port=port,
+                username=username,
+                password=password,
+                key_filename=key_filename,
+                allow_agent=use_keys,
+                look_for_keys=use_keys,
+                disabled_algorithms=DISABLED_ALGORITHMS,
+                sock=sock,
+            )
+        except Exception:
+            client.close()
+            sock.close()
+            raise
+        client.get_transport().set_keepalive(self.keepalive)
+        return client
+    
+    def release(self, client: paramiko.SSHClient, discard: bool = False) -> None:
+        """
+        Hand back a connection borrowed with get(), keeping it open for reuse.
+        
+        Args:
+            client: Client returned by get()
+            discard: The caller hit an error on this connection. It is dropped from the
+                pool and closed - at once if its transport is down, otherwise once the
+                last thread using it hands it back.
+        """
+        to_close = []
+        with self._lock:
+            remaining = self._in_use.get(client, 0) - 1
+            if remaining > 0:
+                self._in_use[client] = remaining
+            else:
+                self._in_use.pop(client, None)
+            
+            if discard:
+                self._forget(client)
+                transport = client.get_transport()
+                if transport is not None and transport.is_active() and remaining > 0:
+                    self._closing.add(client)
+                else:
+                    self._closing.discard(client)
+                    to_close.append(client)
+            elif client in self._closing and remaining <= 0:
+                self._closing.discard(client)
+                to_close.append(client)
+            
+            to_close.extend(self._evict_idle())
+        for idle_client in to_close:
+            idle_client.close()
+    
+    def _forget(self, client: paramiko.SSHClient) -> None:
+        """Remove a client from the pool so it is not handed out again. Call with the lock held."""
+        for key, pooled in list(self._clients.items()):
+            if pooled is client:
+                del self._clients[key]
+    
+    def _evict_idle(self) -> List[paramiko.SSHClient]:
+        """Drop least recently used idle connections beyond max_idle. Call with the lock held."""
+        evicted = []
+        for key, client in list(self._clients.items()):
+            if len(self._clients) <= self.max_idle:
+                break
+            if self._in_use.get(client, 0) <= 0:
+                evicted.append(self._clients.pop(key))
+        return evicted
+    
+    def close(self, hostname: str, port: int, username: str) -> None:
+        """Drop the host's connection from the pool, closing it once nobody is using it."""
+        with self._lock:
+            client = self._clients.pop((hostname, port, username), None)
+            if client is not None and self._in_use.get(client, 0) > 0:
+                self._closing.add(client)
+                client = None
+        if client is not None:
+            client.close()
+    
+    def close_all(self) -> None:
+        """Close every pooled connection."""
+        with self._lock:
+            clients = list(self._clients.values()) + list(self._closing)
+            self._clients.clear()
+            self._in_use.clear()
+            self._closing.clear()
+        for client in clients:
+            client.close()
+
+
+# Shared pool used when update_password is not handed a client
+connection_pool = SSHConnectionPool()
+atexit.register(connection_pool.close_all)
+
+
+def run_many(
+    client: paramiko.SSHClient,
+    commands: List[str],
+    input_data: Optional[str] = None,
+) -> Tuple[int, str]:
+    """
+    Run several commands over a single SSH channel, stopping at the first failure.
+    
+    The commands are joined with && into one exec request, so the channel setup is
+    paid only once and a failing command keeps the later ones from running.
+    input_data is written to the channel's stdin, where it is read by whichever
+    command reads stdin - secrets passed this way never appear in a command line.
+    
+    Args:
+        client: Connected SSH client
+        commands: Shell commands to run in order
+        input_data: Text to send on stdin, or None to send nothing
+        
+    Returns:
+        Tuple of (exit_status, output) for the chain; output is stderr
+    """
+    stdin, stdout, stderr = client.exec_command(" && ".join(commands))
+    try:
+        if input_data is not None:
+            stdin.write(input_data)
+        stdin.channel.shutdown_write()
+    except (OSError, paramiko.SSHException):
+        # The chain failed and closed the channel before reading its input (e.g. the
+        # user check failed) - the exit status and stderr below say why
+        pass
+    
+    exit_status = stdout.channel.recv_exit_status()
+    return exit_status, stderr.read().decode().strip()
 
 
 def update_password(
     hostname: str,
     port: int,
     ssh_username: str,
-    ssh_password: str,
+    ssh_password: Optional[str],
     target_username: str,
     new_password: str,
+    client: Optional[paramiko.SSHClient] = None,
+    key_filename: Optional[str] = None,
 ) -> Tuple[bool, str]:
     """
     SSH into a server and update a user's password.
@@ -26,49 +335,57 @@ def update_password(
         hostname: The server hostname or IP address
         port: SSH port
         ssh_username: Username for SSH login
-        ssh_password: Password for SSH login
+        ssh_password: Password for SSH login, or None to use keys only
         target_username: User whose password will be changed
         new_password: New password to set
+        client: Connected client to use; borrowed from connection_pool if not given
+        key_filename: Private key file for SSH login
         
     Returns:
         Tuple of (success_boolean, message)
     """
-    client = paramiko.SSHClient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    pooled = client is None
     
     try:
-        # Connect to the server
-        print(f"Connecting to {hostname}:{port}...")
-        client.connect(hostname, port=port, username=ssh_username, password=ssh_password)
+        # Connect to the server, reusing an open connection where possible
+        if pooled:
+            client = connection_pool.get(hostname, port, ssh_username, ssh_password, key_filename)
         
-        # Prepare the password change command
-        # The echo command pipes the password to passwd's stdin
-        command = f"echo '{target_username}:{new_password}' | sudo chpasswd"
+        # Check the user exists, then change the password - chpasswd only runs if
+        # the check passes. The credentials are written to chpasswd's stdin, so they
+        # never appear in a command line, the remote process list or audit logs.
+        commands = [
+            f"id -u {shlex.quote(target_username)} > /dev/null",
+            "sudo chpasswd",
+        ]
         
-        # Execute the command
+        # Execute the commands and wait for them to complete
         print(f"Changing password for user '{target_username}' on {hostname}...")
-        stdin, stdout, stderr = client.exec_command(command)
-        
-        # Wait for the command to complete
-        exit_status = stdout.channel.recv_exit_status()
+        exit_status, error = run_many(client, commands, f"{target_username}:{new_password}\n")
         
         if exit_status == 0:
-            return True, f"Password updated successfully for {target_username} on {hostname}"
+            result = True, f"Password updated successfully for {target_username} on {hostname}"
         else:
-            error = stderr.read().decode().strip()
-            return False, f"Failed to update password on {hostname}: {error}"
+            result = False, f"Failed to update password on {hostname}: {error}"
     
     except Exception as e:
+        # Drop the connection so the next attempt starts from a fresh handshake -
+        # other threads still running commands on it keep it until they finish
+        if pooled and client is not None:
+            connection_pool.release(client, discard=True)
         return False, f"Error connecting to {hostname}: {str(e)}"
     
-    finally:
-        client.close()
+    # Hand the connection back so later operations on this host can reuse it
+    if pooled:
+        connection_pool.release(client)
+    return result
 
 
 def main():
     """Main function to execute the password update across multiple servers."""
     
-    # Get the list of servers from a file
+    # Get the list of servers from a file - it is read once, so the hosts shown
+    # for confirmation are exactly the hosts that get updated
     try:
         with open("servers.txt", "r") as f:
             servers = [line.strip() for line in f if line.strip()]
@@ -83,7 +400,8 @@ def main():
     
     # Get SSH credentials
     ssh_username = input("SSH Username: ")
-    ssh_password = getpass.getpass("SSH Password: ")
+    key_filename = input("Path to SSH private key (press Enter to use ssh-agent or password): ") or None
+    ssh_password = getpass.getpass("SSH Password (press Enter to use keys only): ") or None
     
     # Get the target user and new password
     target_username = input("Username to change password for: ")
@@ -102,39 +420,55 @@ def main():
     for server in servers:
         print(f"  - {server}")
     
-    confirm = input(f"\nUpdate password for user '{target_username}' on {len(servers)} servers? (y/n): ")
+    server_count = len(servers)
+    confirm = input(f"\nUpdate password for user '{target_username}' on {server_count} servers? (y/n): ")
     if confirm.lower() != 'y':
         print("Operation cancelled.")
         sys.exit(0)
     
-    # Update password on each server
-    results = []
-    for hostname in servers:
-        success, message = update_password(
-            hostname, 
-            ssh_port, 
-            ssh_username, 
-            ssh_password,
-            target_username, 
-            new_password
-        )
-        results.append((hostname, success, message))
-        print(message)
-        # Small delay between connections to avoid overwhelming network
-        time.sleep(1)
+    # Update password on all servers concurrently - each update is network-bound,
+    # so a thread per connection lets the SSH handshakes overlap. At most
+    # MAX_WORKERS updates run at a time, and only failures are kept.
+    success_count = 0
+    errors = []
+    
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, server_count)) as executor:
+        futures = {
+            executor.submit(
+                update_password,
+                hostname,
+                ssh_port,
+                ssh_username,
+                ssh_password,
+                target_username,
+                new_password,
+                key_filename=key_filename
+            ): hostname
+            for hostname in servers
+        }
+        
+        for future in as_completed(futures):
+            success, message = future.result()
+            print(message)
+            if success:
+                success_count += 1
+            else:
+                errors.append((futures[future], message))
+    
+    # Connections stay pooled for the run, with idle ones beyond MAX_WORKERS
+    # closed as new hosts connect - close the rest now the run is finished
+    connection_pool.close_all()
     
     # Print summary
     print("\nPassword Update Summary:")
     print("-----------------------")
-    success_count = sum(1 for _, success, _ in results if success)
-    print(f"Successful: {success_count}/{len(servers)}")
-    print(f"Failed: {len(servers) - success_count}/{len(servers)}")
+    print(f"Successful: {success_count}/{server_count}")
+    print(f"Failed: {server_count - success_count}/{server_count}")
     
-    if len(servers) - success_count > 0:
+    if errors:
         print("\nServers with errors:")
-        for hostname, success, message in results:
-            if not success:
-                print(f"  - {hostname}: {message}")
+        for hostname, message in errors:
+            print(f"  - {hostname}: {message}")
 
 
 if __name__ == "__main__":
@@ -4,12 +4,78 @@ Script to update user passwords across multiple EC2 instances using AWS SSM
 Requires boto3: pip install boto3
 """
 
+import base64
 import boto3
 import getpass
+import mmap
+import os
+import shlex
 import time
 import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# Maximum number of SSM requests run at once
+MAX_WORKERS = 32
+
+# send_command accepts at most 50 instance IDs per call
+SEND_BATCH_SIZE = 50
+
+# Parameter Store path for the temporary password parameters
+PASSWORD_PARAMETER_PREFIX = "/password-update"
+
+# boto3 clients default to 10 pooled HTTPS connections, which would serialize
+# MAX_WORKERS concurrent requests - size the pool to cover them. TCP keepalive
+# stops idle pooled connections being dropped between polls, which would force
+# a new TLS handshake. Adaptive retries let botocore back off on throttling
+# instead of failing the request.
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 10}
+)
+
+
+@lru_cache(maxsize=None)
+def get_client(service_name):
+    """
+    Get a shared client for an AWS service, creating it on first use
+    
+    Clients are built from the default session, so credentials and service
+    models are only loaded once.
+    
+    Args:
+        service_name: AWS service name, e.g. 'ec2' or 'ssm'
+        
+    Returns:
+        boto3 client
+    """
+    return boto3.client(service_name, config=CLIENT_CONFIG)
+
+
+def read_lines(path):
+    """
+    Read stripped, non-empty lines from a file
+    
+    The file is memory-mapped and split in a single pass, which is much faster
+    than iterating line by line for large inventories.
+    
+    Args:
+        path: Path of the file to read
+        
+    Returns:
+        List of lines
+    """
+    with open(path, "rb") as f:
+        # mmap cannot map an empty file
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [line.strip().decode() for line in mm.read().splitlines() if line.strip()]
+
 
 def get_instance_ids(tags=None, instance_ids=None):
     """
@@ -22,7 +88,7 @@ def get_instance_ids(tags=None, instance_ids=None):
     Returns:
         List of instance IDs
     """
-    ec2 = boto3.client('ec2')
+    ec2 = get_client('ec2')
     instance_list = []
     
     if instance_ids:
@@ -45,13 +111,129 @@ def get_instance_ids(tags=None, instance_ids=None):
     
     # If no filters or instance IDs provided, get list from file
     try:
-        with open("instance_ids.txt", "r") as f:
-            return [line.strip() for line in f if line.strip()]
+        return read_lines("instance_ids.txt")
     except FileNotFoundError:
         print("Error: instance_ids.txt file not found and no tags or instance IDs provided.")
         return []
 
 
+def get_error_detail(ssm, command_id, instance_id):
+    """
+    Fetch the error output of a failed command on a single instance
+    
+    Args:
+        ssm: SSM client
+        command_id: ID of the command sent to the instance
+        instance_id: EC2 instance ID
+        
+    Returns:
+        Error message string
+    """
+    try:
+        result = ssm.get_command_invocation(CommandId=command_id, InstanceId=instance_id)
+        return result.get('StandardErrorContent') or 'Unknown error'
+    except ClientError as e:
+        return str(e)
+
+
+def send_command_batches(ssm, instance_ids, **send_args):
+    """
+    Send a command to instances in batches of up to 50, the send_command limit
+    
+    Args:
+        ssm: SSM client
+        instance_ids: List of EC2 instance IDs
+        send_args: Remaining send_command arguments (document, parameters, ...)
+        
+    Returns:
+        tuple: (command_ids, errors) - dictionaries mapping each instance ID to the
+        command ID it was sent with, or to the error that stopped its batch
+    """
+    batches = [instance_ids[i:i + SEND_BATCH_SIZE] for i in range(0, len(instance_ids), SEND_BATCH_SIZE)]
+    
+    def send(batch):
+        try:
+            response = ssm.send_command(InstanceIds=batch, **send_args)
+            return response['Command']['CommandId'], None
+        except ClientError as e:
+            return None, str(e)
+    
+    # Batches are independent, so submit them concurrently
+    with ThreadPoolExecutor(max_workers=min(10, len(batches))) as executor:
+        sent = list(executor.map(send, batches))
+    
+    command_ids = {}
+    errors = {}
+    for batch, (command_id, error) in zip(batches, sent):
+        for instance_id in batch:
+            if command_id:
+                command_ids[instance_id] = command_id
+            else:
+                errors[instance_id] = error
+    
+    return command_ids, errors
+
+
+def list_invocation_statuses(ssm, command_id):
+    """
+    Get the status of a command on every instance it was sent to
+    
+    Args:
+        ssm: SSM client
+        command_id: ID of the command to check
+        
+    Returns:
+        List of (instance_id, status) tuples
+    """
+    statuses = []
+    paginator = ssm.get_paginator('list_command_invocations')
+    
+    # A single list_command_invocations call returns up to 50 instances at once
+    for page in paginator.paginate(CommandId=command_id, Details=False):
+        for invocation in page['CommandInvocations']:
+            statuses.append((invocation['InstanceId'], invocation['Status']))
+    
+    return statuses
+
+
+def store_password_parameter(ssm, new_password):
+    """
+    Store a password as a temporary SecureString parameter
+    
+    The value is base64 encoded so it can be substituted into a shell command
+    without any quoting issues.
+    
+    Args:
+        ssm: SSM client
+        new_password: Password to store
+        
+    Returns:
+        Name of the created parameter
+    """
+    parameter_name = f"{PASSWORD_PARAMETER_PREFIX}/{uuid.uuid4()}"
+    ssm.put_parameter(
+        Name=parameter_name,
+        Value=base64.b64encode(new_password.encode()).decode(),
+        Type='SecureString',
+        Description="Temporary password for an SSM password update"
+    )
+    return parameter_name
+
+
+def delete_password_parameter(ssm, parameter_name):
+    """
+    Delete a temporary password parameter, warning if it cannot be removed
+    
+    Args:
+        ssm: SSM client
+        parameter_name: Name of the parameter to delete
+    """
+    try:
+        ssm.delete_parameter(Name=parameter_name)
+    except ClientError as e:
+        print(f"Warning: Could not delete parameter {parameter_name}: {e}")
+
+
 def update_password(instance_ids, username, new_password):
     """
     Update password for a user across multiple instances using SSM
@@ -67,71 +249,105 @@ def update_password(instance_ids, username, new_password):
     if not instance_ids:
         return {"success": False, "message": "No instances provided"}
     
-    ssm = boto3.client('ssm')
+    ssm = get_client('ssm')
     
     # Create a secure password command
-    # We're using the chpasswd command which takes input in the format username:password
-    command = f"echo '{username}:{new_password}' | sudo chpasswd"
+    # The password is kept in a SecureString parameter and referenced from the command,
+    # so it never appears in the command text stored by SSM. chpasswd takes input in
+    # the format username:password.
+    try:
+        parameter_name = store_password_parameter(ssm, new_password)
+    except ClientError as e:
+        return {"success": False, "message": f"Error storing password parameter: {str(e)}"}
+    
+    command = (
+        f"printf '%s:%s\\n' {shlex.quote(username)} "
+        f"\"$(echo '{{{{ssm-secure:{parameter_name}}}}}' | base64 -d)\" | sudo chpasswd"
+    )
     
     try:
-        # Send the command to all instances
-        response = ssm.send_command(
-            InstanceIds=instance_ids,
+        # Send the command to all instances, in batches of up to 50
+        command_ids, send_errors = send_command_batches(
+            ssm,
+            instance_ids,
             DocumentName="AWS-RunShellScript",
             Parameters={'commands': [command]},
             Comment=f"Update password for user {username}"
         )
         
-        command_id = response['Command']['CommandId']
-        print(f"Command sent successfully. Command ID: {command_id}")
+        if not command_ids:
+            return {"success": False, "message": f"Error sending command: {next(iter(send_errors.values()))}"}
         
-        # Wait for command completion
+        for command_id in dict.fromkeys(command_ids.values()):
+            print(f"Command sent successfully. Command ID: {command_id}")
+        
+        # Track results for every instance - those whose batch failed to send are already done
         results = {}
         for instance_id in instance_ids:
-            results[instance_id] = {"status": "Pending", "message": ""}
+            if instance_id in send_errors:
+                results[instance_id] = {"status": "Error", "message": f"Error sending command: {send_errors[instance_id]}"}
+            else:
+                results[instance_id] = {"status": "Pending", "message": ""}
         
         # Poll for command completion
-        all_complete = False
-        retries = 0
-        max_retries = 30  # 5 minutes max with 10 second intervals
-        
-        while not all_complete and retries < max_retries:
-            time.sleep(10)
-            retries += 1
-            all_complete = True
+        pending = set(command_ids)
+        failed = []
+        timeout = 300  # 5 minutes max
+        deadline = time.monotonic() + timeout
+        delay = 0.25  # Doubles after each check, up to 8 seconds
+        poll_error = None  # Error from the last status check, if it failed
+        
+        while pending and time.monotonic() < deadline:
+            # Back off exponentially - fast commands are reaped quickly, slow ones
+            # are not polled more than needed
+            time.sleep(min(delay, max(0, deadline - time.monotonic())))
+            delay = min(delay * 2, 8)
             
-            for instance_id in instance_ids:
-                if results[instance_id]["status"] in ["Pending", "InProgress"]:
-                    try:
-                        result = ssm.get_command_invocation(
-                            CommandId=command_id,
-                            InstanceId=instance_id
-                        )
-                        
-                        status = result['Status']
-                        results[instance_id]["status"] = status
-                        
-                        if status == "Success":
-                            results[instance_id]["message"] = "Password updated successfully"
-                        elif status == "Failed":
-                            results[instance_id]["message"] = f"Failed: {result.get('StandardErrorContent', 'Unknown error')}"
-                        elif status in ["Pending", "InProgress"]:
-                            all_complete = False
-                        else:
-                            results[instance_id]["message"] = f"Status: {status}"
+            try:
+                statuses = []
+                for command_id in set(command_ids.values()):
+                    statuses.extend(list_invocation_statuses(ssm, command_id))
+                
+                for instance_id, status in statuses:
+                    if instance_id not in pending or status in ["Pending", "InProgress", "Delayed"]:
+                        continue
                     
-                    except ClientError as e:
-                        if "InvalidInstanceId" in str(e):
-                            results[instance_id]["status"] = "Failed"
-                            results[instance_id]["message"] = "Instance not found or not configured for SSM"
-                        else:
-                            results[instance_id]["status"] = "Error"
-                            results[instance_id]["message"] = str(e)
+                    pending.discard(instance_id)
+                    results[instance_id]["status"] = status
+                    
+                    if status == "Success":
+                        results[instance_id]["message"] = "Password updated successfully"
+                    elif status == "Failed":
+                        failed.append(instance_id)
+                    else:
+                        results[instance_id]["message"] = f"Status: {status}"
+                
+                poll_error = None
+            
+            except ClientError as e:
+                # A failed check says nothing about the commands themselves - keep
+                # polling until the deadline and report the error only if it persists
+                poll_error = e
+        
+        for instance_id in pending:
+            if poll_error is not None:
+                results[instance_id]["status"] = "Error"
+                results[instance_id]["message"] = f"Timed out waiting for command completion: {poll_error}"
+            else:
+                results[instance_id]["message"] = "Timed out waiting for command completion"
+        
+        # Only failed instances need the full invocation, for their error output
+        if failed:
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(failed))) as executor:
+                errors = executor.map(lambda instance_id: get_error_detail(ssm, command_ids[instance_id], instance_id), failed)
+                for instance_id, error in zip(failed, errors):
+                    results[instance_id]["message"] = f"Failed: {error}"
         
         return {"success": True, "results": results}
     
-    except ClientError as e:
-        return {"success": False, "message": f"Error sending command: {str(e)}"}
+    finally:
+        # The parameter is only needed until every instance has run the command
+        delete_password_parameter(ssm, parameter_name)
 
 
 def main():
@@ -139,6 +355,16 @@ def main():
     print("AWS SSM Password Update Tool")
     print("===========================")
     
+    # Get target username and new password first, so a mistyped confirmation
+    # exits before any instance lookups are made
+    username = input("\nUsername to change password for: ")
+    new_password = getpass.getpass("New password: ")
+    confirm_password = getpass.getpass("Confirm new password: ")
+    
+    if new_password != confirm_password:
+        print("Error: Passwords do not match")
+        sys.exit(1)
+    
     # Determine target instances
     print("\nHow would you like to select EC2 instances?")
     print("1. From a file (instance_ids.txt)")
@@ -151,8 +377,7 @@ def main():
     
     if choice == "1":
         try:
-            with open("instance_ids.txt", "r") as f:
-                instance_ids = [line.strip() for line in f if line.strip()]
+            instance_ids = read_lines("instance_ids.txt")
             if not instance_ids:
                 print("Error: No instance IDs found in instance_ids.txt")
                 sys.exit(1)
@@ -192,15 +417,6 @@ def main():
     for id in instance_ids:
         print(f"  - {id}")
     
-    # Get target username and new password
-    username = input("\nUsername to change password for: ")
-    new_password = getpass.getpass("New password: ")
-    confirm_password = getpass.getpass("Confirm new password: ")
-    
-    if new_password != confirm_password:
-        print("Error: Passwords do not match")
-        sys.exit(1)
-    
     # Confirm before proceeding
     confirm = input(f"\nUpdate password for user '{username}' on {len(instance_ids)} instances? (y/n): ")
     if confirm.lower() != 'y':
@@ -7,12 +7,126 @@ Requires boto3: pip install boto3
 run this in the aws cli
 """
 
+import base64
 import boto3
 import getpass
+import io
+import ipaddress
+import json
+import mmap
+import os
+import shlex
 import time
 import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# Maximum number of SSM requests run at once
+MAX_WORKERS = 32
+
+# send_command accepts at most 50 instance IDs per call
+SEND_BATCH_SIZE = 50
+
+# Parameter Store path for the temporary password parameters
+PASSWORD_PARAMETER_PREFIX = "/password-update"
+
+# describe_instance_information accepts at most 50 values per filter
+FILTER_BATCH_SIZE = 50
+
+# describe_instances accepts at most 200 values per filter
+EC2_FILTER_BATCH_SIZE = 200
+
+# boto3 clients default to 10 pooled HTTPS connections, which would serialize
+# MAX_WORKERS concurrent requests - size the pool to cover them. TCP keepalive
+# stops idle pooled connections being dropped between polls, which would force
+# a new TLS handshake. Adaptive retries let botocore back off on throttling
+# instead of failing the request.
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 10}
+)
+
+
+@lru_cache(maxsize=None)
+def get_client(service_name):
+    """
+    Get a shared client for an AWS service, creating it on first use
+    
+    Clients are built from the default session, so credentials and service
+    models are only loaded once.
+    
+    Args:
+        service_name: AWS service name, e.g. 'ec2' or 'ssm'
+        
+    Returns:
+        boto3 client
+    """
+    return boto3.client(service_name, config=CLIENT_CONFIG)
+
+
+def read_lines(path):
+    """
+    Read stripped, non-empty lines from a file
+    
+    The file is memory-mapped and split in a single pass, which is much faster
+    than iterating line by line for large inventories.
+    
+    Args:
+        path: Path of the file to read
+        
+    Returns:
+        List of lines
+    """
+    with open(path, "rb") as f:
+        # mmap cannot map an empty file
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [line.strip().decode() for line in mm.read().splitlines() if line.strip()]
+
+
+def print_items(items):
+    """
+    Print a bulleted list with a single write instead of one print per item
+    
+    Args:
+        items: Strings to list
+    """
+    buf = io.StringIO()
+    buf.writelines(f"  - {item}\n" for item in items)
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
+
+
+def filter_valid_ips(values):
+    """
+    Drop entries that are not valid IP addresses, warning about each one
+    
+    Args:
+        values: List of IP address strings
+        
+    Returns:
+        List of valid IP addresses
+    """
+    valid = []
+    invalid = []
+    for value in values:
+        try:
+            ipaddress.ip_address(value)
+            valid.append(value)
+        except ValueError:
+            invalid.append(value)
+    
+    if invalid:
+        print(f"\nWarning: Skipping {len(invalid)} invalid IP addresses:")
+        print_items(invalid)
+    
+    return valid
+
 
 def get_instance_ids_from_ips(private_ips):
     """
@@ -24,22 +138,28 @@ def get_instance_ids_from_ips(private_ips):
     Returns:
         Dictionary mapping private IPs to instance IDs
     """
-    ec2 = boto3.client('ec2')
+    ec2 = get_client('ec2')
     ip_to_instance = {}
+    private_ip_set = set(private_ips)
     
     try:
-        response = ec2.describe_instances(
-            Filters=[
-                {'Name': 'private-ip-address', 'Values': private_ips},
-                {'Name': 'instance-state-name', 'Values': ['running']}
-            ]
-        )
-        
-        for reservation in response['Reservations']:
-            for instance in reservation['Instances']:
-                private_ip = instance.get('PrivateIpAddress')
-                if private_ip and private_ip in private_ips:
-                    ip_to_instance[private_ip] = instance['InstanceId']
+        # EC2 filters accept at most 200 values, so look the IPs up in batches
+        paginator = ec2.get_paginator('describe_instances')
+        for i in range(0, len(private_ips), EC2_FILTER_BATCH_SIZE):
+            batch = private_ips[i:i + EC2_FILTER_BATCH_SIZE]
+            pages = paginator.paginate(
+                Filters=[
+                    {'Name': 'private-ip-address', 'Values': batch},
+                    {'Name': 'instance-state-name', 'Values': ['running']}
+                ]
+            )
+            
+            for page in pages:
+                for reservation in page['Reservations']:
+                    for instance in reservation['Instances']:
+                        private_ip = instance.get('PrivateIpAddress')
+                        if private_ip and private_ip in private_ip_set:
+                            ip_to_instance[private_ip] = instance['InstanceId']
         
         return ip_to_instance
     
@@ -69,8 +189,7 @@ def get_instance_info():
     
     if choice == "1":  # From file with private IPs
         try:
-            with open("ip_addresses.txt", "r") as f:
-                private_ips = [line.strip() for line in f if line.strip()]
+            private_ips = filter_valid_ips(read_lines("ip_addresses.txt"))
             
             if not private_ips:
                 print("Error: No IP addresses found in ip_addresses.txt")
@@ -89,8 +208,7 @@ def get_instance_info():
             not_found = [ip for ip in private_ips if ip not in ip_to_instance]
             if not_found:
                 print(f"\nWarning: Could not find instances for {len(not_found)} IP addresses:")
-                for ip in not_found:
-                    print(f"  - {ip}")
+                print_items(not_found)
         
         except FileNotFoundError:
             print("Error: ip_addresses.txt file not found")
@@ -99,8 +217,7 @@ def get_instance_info():
     
     elif choice == "2":  # From file with instance IDs
         try:
-            with open("instance_ids.txt", "r") as f:
-                instance_ids = [line.strip() for line in f if line.strip()]
+            instance_ids = read_lines("instance_ids.txt")
             
             if not instance_ids:
                 print("Error: No instance IDs found in instance_ids.txt")
@@ -126,7 +243,7 @@ def get_instance_info():
             print("No tags specified. Exiting.")
             sys.exit(1)
         
-        ec2 = boto3.client('ec2')
+        ec2 = get_client('ec2')
         filters = [{'Name': f"tag:{tag['Key']}", 'Values': [tag['Value']]} for tag in tags]
         
         try:
@@ -153,7 +270,7 @@ def get_instance_info():
     
     elif choice == "4":  # Specify IPs directly
         ips_input = input("Enter private IP addresses separated by commas: ")
-        private_ips = [ip.strip() for ip in ips_input.split(",") if ip.strip()]
+        private_ips = filter_valid_ips([ip.strip() for ip in ips_input.split(",") if ip.strip()])
         
         if not private_ips:
             print("No IP addresses specified. Exiting.")
@@ -172,8 +289,7 @@ def get_instance_info():
         not_found = [ip for ip in private_ips if ip not in ip_to_instance]
         if not_found:
             print(f"\nWarning: Could not find instances for {len(not_found)} IP addresses:")
-            for ip in not_found:
-                print(f"  - {ip}")
+            print_items(not_found)
     
     elif choice == "5":  # Specify instance IDs directly
         ids_input = input("Enter instance IDs separated by commas: ")
@@ -206,26 +322,201 @@ def verify_ssm_availability(instance_ids):
     Returns:
         tuple: (available_instances, unavailable_instances)
     """
-    ssm = boto3.client('ssm')
+    ssm = get_client('ssm')
     
-    try:
+    # Drop repeated IDs, keeping the first occurrence - send_command rejects a batch
+    # that names an instance twice
+    instance_ids = list(dict.fromkeys(instance_ids))
+    
+    def describe_batch(batch):
+        # Filter server-side so only the requested instances are returned
+        found = []
         paginator = ssm.get_paginator('describe_instance_information')
+        for page in paginator.paginate(Filters=[{'Key': 'InstanceIds', 'Values': batch}]):
+            for instance in page['InstanceInformationList']:
+                found.append(instance['InstanceId'])
+        return found
+    
+    try:
+        # The InstanceIds filter accepts at most 50 values, so query in batches
+        batches = [instance_ids[i:i + FILTER_BATCH_SIZE] for i in range(0, len(instance_ids), FILTER_BATCH_SIZE)]
         available_instances = set()
         
-        for page in paginator.paginate():
-            for instance in page['InstanceInformationList']:
-                if instance['InstanceId'] in instance_ids:
-                    available_instances.add(instance['InstanceId'])
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(batches))) as executor:
+            for found in executor.map(describe_batch, batches):
+                available_instances.update(found)
         
         unavailable_instances = [id for id in instance_ids if id not in available_instances]
-        return list(available_instances), unavailable_instances
+        return [id for id in instance_ids if id in available_instances], unavailable_instances
     
     except ClientError as e:
         print(f"Error checking SSM availability: {e}")
         return [], instance_ids
 
 
-def update_password(instance_ids, username, new_password):
+def get_error_detail(ssm, command_id, instance_id):
+    """
+    Fetch the error output of a failed command on a single instance
+    
+    Args:
+        ssm: SSM client
+        command_id: ID of the command sent to the instance
+        instance_id: EC2 instance ID
+        
+    Returns:
+        Error message string
+    """
+    try:
+        result = ssm.get_command_invocation(CommandId=command_id, InstanceId=instance_id)
+        return result.get('StandardErrorContent') or 'Unknown error'
+    except ClientError as e:
+        return str(e)
+
+
+def send_command_batches(ssm, instance_ids, **send_args):
+    """
+    Send a command to instances in batches of up to 50, the send_command limit
+    
+    Args:
+        ssm: SSM client
+        instance_ids: List of EC2 instance IDs
+        send_args: Remaining send_command arguments (document, parameters, ...)
+        
+    Returns:
+        tuple: (command_ids, errors) - dictionaries mapping each instance ID to the
+        command ID it was sent with, or to the error that stopped its batch
+    """
+    batches = [instance_ids[i:i + SEND_BATCH_SIZE] for i in range(0, len(instance_ids), SEND_BATCH_SIZE)]
+    
+    def send(batch):
+        try:
+            response = ssm.send_command(InstanceIds=batch, **send_args)
+            return response['Command']['CommandId'], None
+        except ClientError as e:
+            return None, str(e)
+    
+    # Batches are independent, so submit them concurrently
+    with ThreadPoolExecutor(max_workers=min(10, len(batches))) as executor:
+        sent = list(executor.map(send, batches))
+    
+    command_ids = {}
+    errors = {}
+    for batch, (command_id, error) in zip(batches, sent):
+        for instance_id in batch:
+            if command_id:
+                command_ids[instance_id] = command_id
+            else:
+                errors[instance_id] = error
+    
+    return command_ids, errors
+
+
+def list_invocation_statuses(ssm, command_id):
+    """
+    Get the status of a command on every instance it was sent to
+    
+    Args:
+        ssm: SSM client
+        command_id: ID of the command to check
+        
+    Returns:
+        List of (instance_id, status) tuples
+    """
+    statuses = []
+    paginator = ssm.get_paginator('list_command_invocations')
+    
+    # A single list_command_invocations call returns up to 50 instances at once
+    for page in paginator.paginate(CommandId=command_id, Details=False):
+        for invocation in page['CommandInvocations']:
+            statuses.append((invocation['InstanceId'], invocation['Status']))
+    
+    return statuses
+
+
+def receive_notifications(sqs, queue_url, command_ids, wait_seconds=20):
+    """
+    Wait for SSM completion notifications delivered to an SQS queue via SNS
+    
+    Args:
+        sqs: SQS client
+        queue_url: URL of the queue subscribed to the notification topic
+        command_ids: IDs of the commands to collect notifications for
+        wait_seconds: Longest time to wait for a message, up to the SQS limit of 20
+        
+    Returns:
+        List of (instance_id, status) tuples, empty if nothing arrived
+    """
+    response = sqs.receive_message(
+        QueueUrl=queue_url,
+        WaitTimeSeconds=max(0, min(20, int(wait_seconds))),
+        MaxNumberOfMessages=10
+    )
+    
+    statuses = []
+    for message in response.get('Messages', []):
+        # The queue may be shared - anything that isn't an SSM command notification
+        # is left on the queue for whoever else reads it
+        try:
+            body = json.loads(message['Body'])
+            
+            # SNS wraps the notification in an envelope unless raw delivery is enabled
+            if isinstance(body, dict) and body.get('Type') == 'Notification':
+                body = json.loads(body['Message'])
+        except (ValueError, TypeError, KeyError):
+            continue
+        
+        if not isinstance(body, dict) or not all(key in body for key in ('commandId', 'instanceId', 'status')):
+            continue
+        
+        # Leave other commands' notifications alone too
+        if body['commandId'] not in command_ids:
+            continue
+        
+        statuses.append((body['instanceId'], body['status']))
+        sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message['ReceiptHandle'])
+    
+    return statuses
+
+
+def store_password_parameter(ssm, new_password):
+    """
+    Store a password as a temporary SecureString parameter
+    
+    The value is base64 encoded so it can be substituted into a shell command
+    without any quoting issues.
+    
+    Args:
+        ssm: SSM client
+        new_password: Password to store
+        
+    Returns:
+        Name of the created parameter
+    """
+    parameter_name = f"{PASSWORD_PARAMETER_PREFIX}/{uuid.uuid4()}"
+    ssm.put_parameter(
+        Name=parameter_name,
+        Value=base64.b64encode(new_password.encode()).decode(),
+        Type='SecureString',
+        Description="Temporary password for an SSM password update"
+    )
+    return parameter_name
+
+
+def delete_password_parameter(ssm, parameter_name):
+    """
+    Delete a temporary password parameter, warning if it cannot be removed
+    
+    Args:
+        ssm: SSM client
+        parameter_name: Name of the parameter to delete
+    """
+    try:
+        ssm.delete_parameter(Name=parameter_name)
+    except ClientError as e:
+        print(f"Warning: Could not delete parameter {parameter_name}: {e}")
+
+
+def update_password(instance_ids, username, new_password, notification=None):
     """
     Update password for a user across multiple instances using SSM
     
@@ -233,6 +524,8 @@ def update_password(instance_ids, username, new_password):
         instance_ids: List of EC2 instance IDs
         username: Username to update
         new_password: New password to set
+        notification: Optional dictionary with 'topic_arn', 'role_arn' and 'queue_url'
+            to receive completion events over SNS/SQS instead of polling
         
     Returns:
         Dictionary with results
@@ -240,81 +533,151 @@ def update_password(instance_ids, username, new_password):
     if not instance_ids:
         return {"success": False, "message": "No instances provided"}
     
-    ssm = boto3.client('ssm')
+    ssm = get_client('ssm')
     
     # Create a secure password command
-    # We're using the chpasswd command which takes input in the format username:password
-    command = f"echo '{username}:{new_password}' | sudo chpasswd"
+    # The password is kept in a SecureString parameter and referenced from the command,
+    # so it never appears in the command text stored by SSM. chpasswd takes input in
+    # the format username:password.
+    try:
+        parameter_name = store_password_parameter(ssm, new_password)
+    except ClientError as e:
+        return {"success": False, "message": f"Error storing password parameter: {str(e)}"}
+    
+    command = (
+        f"printf '%s:%s\\n' {shlex.quote(username)} "
+        f"\"$(echo '{{{{ssm-secure:{parameter_name}}}}}' | base64 -d)\" | sudo chpasswd"
+    )
+    
+    send_args = {}
+    if notification:
+        sqs = get_client('sqs')
+        send_args = {
+            'ServiceRoleArn': notification['role_arn'],
+            'NotificationConfig': {
+                'NotificationArn': notification['topic_arn'],
+                'NotificationEvents': ['Success', 'Failed', 'TimedOut', 'Cancelled'],
+                'NotificationType': 'Invocation'
+            }
+        }
     
     try:
-        # Send the command to all instances
-        response = ssm.send_command(
-            InstanceIds=instance_ids,
+        # Send the command to all instances, in batches of up to 50
+        command_ids, send_errors = send_command_batches(
+            ssm,
+            instance_ids,
             DocumentName="AWS-RunShellScript",
             Parameters={'commands': [command]},
-            Comment=f"Update password for user {username}"
+            Comment=f"Update password for user {username}",
+            **send_args
         )
         
-        command_id = response['Command']['CommandId']
-        print(f"Command sent successfully. Command ID: {command_id}")
+        if not command_ids:
+            return {"success": False, "message": f"Error sending command: {next(iter(send_errors.values()))}"}
         
-        # Wait for command completion
+        for command_id in dict.fromkeys(command_ids.values()):
+            print(f"Command sent successfully. Command ID: {command_id}")
+        
+        # Track results for every instance - those whose batch failed to send are already done
         results = {}
         for instance_id in instance_ids:
-            results[instance_id] = {"status": "Pending", "message": ""}
+            if instance_id in send_errors:
+                results[instance_id] = {"status": "Error", "message": f"Error sending command: {send_errors[instance_id]}"}
+            else:
+                results[instance_id] = {"status": "Pending", "message": ""}
         
-        # Poll for command completion
-        all_complete = False
-        retries = 0
-        max_retries = 30  # 5 minutes max with 10 second intervals
+        # Wait for command completion, either from pushed notifications or by polling
+        pending = set(command_ids)
+        failed = []
+        timeout = 300  # 5 minutes max
+        deadline = time.monotonic() + timeout
+        delay = 0.25  # Doubles after each poll, up to 8 seconds
+        poll_error = None  # Error from the last status check, if it failed
         
         print("\nWaiting for command completion...")
         spinner = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
+        frames = [f"\r{frame} Checking status..." for frame in spinner]
         spinner_idx = 0
+        last_update = 0.0
         
-        while not all_complete and retries < max_retries:
-            time.sleep(10)
-            retries += 1
-            all_complete = True
-            
+        # Only animate on a terminal, and at most 4 times a second
+        show_spinner = sys.stdout.isatty()
+        
+        while pending and time.monotonic() < deadline:
             # Simple spinner animation
-            spinner_idx = (spinner_idx + 1) % len(spinner)
-            print(f"\r{spinner[spinner_idx]} Checking status... {retries}/{max_retries}", end="")
+            now = time.monotonic()
+            if show_spinner and now - last_update >= 0.25:
+                last_update = now
+                spinner_idx = (spinner_idx + 1) % len(frames)
+                done = len(instance_ids) - len(pending)
+                sys.stdout.write(f"{frames[spinner_idx]} {done}/{len(instance_ids)}")
+                sys.stdout.flush()
             
-            for instance_id in instance_ids:
-                if results[instance_id]["status"] in ["Pending", "InProgress"]:
-                    try:
-                        result = ssm.get_command_invocation(
-                            CommandId=command_id,
-                            InstanceId=instance_id
-                        )
-                        
-                        status = result['Status']
-                        results[instance_id]["status"] = status
-                        
-                        if status == "Success":
-                            results[instance_id]["message"] = "Password updated successfully"
-                        elif status == "Failed":
-                            results[instance_id]["message"] = f"Failed: {result.get('StandardErrorContent', 'Unknown error')}"
-                        elif status in ["Pending", "InProgress"]:
-                            all_complete = False
-                        else:
-                            results[instance_id]["message"] = f"Status: {status}"
+            try:
+                if notification:
+                    # Long-polls the queue, so no API calls are made between events.
+                    # The wait never runs past the deadline, and on a terminal it is
+                    # kept to a second so the spinner keeps moving.
+                    wait_seconds = deadline - time.monotonic()
+                    if show_spinner:
+                        wait_seconds = min(wait_seconds, 1)
+                    statuses = receive_notifications(sqs, notification['queue_url'], set(command_ids.values()), wait_seconds)
+                else:
+                    # Back off exponentially - fast commands are reaped quickly,
+                    # slow ones are not polled more than needed
+                    time.sleep(min(delay, max(0, deadline - time.monotonic())))
+                    delay = min(delay * 2, 8)
+                    statuses = []
+                    for command_id in set(command_ids.values()):
+                        statuses.extend(list_invocation_statuses(ssm, command_id))
+                
+                for instance_id, status in statuses:
+                    if instance_id not in pending or status in ["Pending", "InProgress", "Delayed"]:
+                        continue
                     
-                    except ClientError as e:
-                        if "InvalidInstanceId" in str(e):
-                            results[instance_id]["status"] = "Failed"
-                            results[instance_id]["message"] = "Instance not found or not configured for SSM"
-                        else:
-                            results[instance_id]["status"] = "Error"
-                            results[instance_id]["message"] = str(e)
-        
-        print("\r" + " " * 50, end="")  # Clear the spinner line
-        print("\rCommand execution completed.")
+                    pending.discard(instance_id)
+                    results[instance_id]["status"] = status
+                    
+                    if status == "Success":
+                        results[instance_id]["message"] = "Password updated successfully"
+                    elif status == "Failed":
+                        failed.append(instance_id)
+                    else:
+                        results[instance_id]["message"] = f"Status: {status}"
+                
+                poll_error = None
+            
+            except ClientError as e:
+                # A failed check says nothing about the commands themselves - keep
+                # polling until the deadline and report the error only if it persists
+                poll_error = e
+                if notification:
+                    # Receiving failed without waiting - back off before retrying
+                    time.sleep(min(delay, max(0, deadline - time.monotonic())))
+                    delay = min(delay * 2, 8)
+        
+        for instance_id in pending:
+            if poll_error is not None:
+                results[instance_id]["status"] = "Error"
+                results[instance_id]["message"] = f"Timed out waiting for command completion: {poll_error}"
+            else:
+                results[instance_id]["message"] = "Timed out waiting for command completion"
+        
+        # Only failed instances need the full invocation, for their error output
+        if failed:
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(failed))) as executor:
+                errors = executor.map(lambda instance_id: get_error_detail(ssm, command_ids[instance_id], instance_id), failed)
+                for instance_id, error in zip(failed, errors):
+                    results[instance_id]["message"] = f"Failed: {error}"
+        
+        if show_spinner:
+            sys.stdout.write("\r" + " " * 50 + "\r")  # Clear the spinner line
+        print("Command execution completed.")
         return {"success": True, "results": results}
     
-    except ClientError as e:
-        return {"success": False, "message": f"Error sending command: {str(e)}"}
+    finally:
+        # The parameter is only needed until every instance has run the command
+        delete_password_parameter(ssm, parameter_name)
 
 
 def main():
@@ -327,6 +690,16 @@ def main():
     if region:
         boto3.setup_default_session(region_name=region)
     
+    # Get target username and new password first, so a mistyped confirmation
+    # exits before any instance lookups are made
+    username = input("\nUsername to change password for: ")
+    new_password = getpass.getpass("New password: ")
+    confirm_password = getpass.getpass("Confirm new password: ")
+    
+    if new_password != confirm_password:
+        print("Error: Passwords do not match")
+        sys.exit(1)
+    
     # Get instance information
     instance_ids, display_info = get_instance_info()
     
@@ -344,8 +717,7 @@ def main():
     
     if unavailable_instances:
         print(f"\nWarning: {len(unavailable_instances)} instances are not available through SSM:")
-        for instance_id in unavailable_instances:
-            print(f"  - {display_info.get(instance_id, instance_id)}")
+        print_items(display_info.get(instance_id, instance_id) for instance_id in unavailable_instances)
         
         proceed = input("\nDo you want to continue with the available instances? (y/n): ")
         if proceed.lower() != 'y':
@@ -354,17 +726,17 @@ def main():
     
     # Display available instances
     print(f"\nReady to update password on {len(available_instances)} instances:")
-    for instance_id in available_instances:
-        print(f"  - {display_info.get(instance_id, instance_id)}")
-    
-    # Get target username and new password
-    username = input("\nUsername to change password for: ")
-    new_password = getpass.getpass("New password: ")
-    confirm_password = getpass.getpass("Confirm new password: ")
-    
-    if new_password != confirm_password:
-        print("Error: Passwords do not match")
-        sys.exit(1)
+    print_items(display_info.get(instance_id, instance_id) for instance_id in available_instances)
+    
+    # Optionally receive completion events over SNS/SQS instead of polling SSM
+    notification = None
+    topic_arn = input("\nSNS topic ARN for completion notifications (press Enter to poll): ")
+    if topic_arn:
+        notification = {
+            "topic_arn": topic_arn,
+            "role_arn": input("IAM role ARN that SSM uses to publish to the topic: "),
+            "queue_url": input("SQS queue URL subscribed to the topic: ")
+        }
     
     # Confirm before proceeding
     confirm = input(f"\nUpdate password for user '{username}' on {len(available_instances)} instances? (y/n): ")
@@ -374,7 +746,7 @@ def main():
     
     # Execute password update
     print("\nUpdating passwords...")
-    result = update_password(available_instances, username, new_password)
+    result = update_password(available_instances, username, new_password, notification)
     
     if not result["success"]:
         print(f"Error: {result['message']}")
@@ -392,9 +764,11 @@ def main():
     
     if len(available_instances) - success_count > 0:
         print("\nInstances with errors:")
-        for instance_id, data in result["results"].items():
-            if data["status"] != "Success":
-                print(f"  - {display_info.get(instance_id, instance_id)}: {data['status']} - {data['message']}")
+        print_items(
+            f"{display_info.get(instance_id, instance_id)}: {data['status']} - {data['message']}"
+            for instance_id, data in result["results"].items()
+            if data["status"] != "Success"
+        )
 
 
 if __name__ == "__main__":